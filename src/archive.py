@@ -0,0 +1,104 @@
+import gzip
+import json
+import os
+import re
+from datetime import datetime
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Archiving is opt-in: the scraper only archives when ARCHIVE_DIR is set, and
+# the directory must outlive the run (e.g. a persistent disk, not a CI workspace)
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR")
+INDEX_FILE = "index.jsonl"
+RUN_ID_FORMAT = "%Y%m%dT%H%M%S"
+
+# Only these operations are archived; they are all re-ingest needs
+ARCHIVED_OPERATIONS = ("GetChampionshipQualifications", "GetRankingScoreCalculation")
+
+def get_operation_name(query):
+    """Return the GraphQL operation name of a query string"""
+    match = re.search(r"\b(?:query|mutation)\s+(\w+)", query)
+    return match.group(1) if match else None
+
+class ResponseArchive:
+    """Append-only, gzip-compressed archive of raw GraphQL responses.
+
+    Each run writes to its own ``<run_id>.jsonl.gz`` file. Every record is a
+    separate gzip member, so the file can be read whole with ``gzip.open`` or
+    a single record can be read by seeking to its offset from ``index.jsonl``.
+    """
+
+    def __init__(self, archive_dir=ARCHIVE_DIR, run_id=None):
+        self.archive_dir = archive_dir
+        self.run_id = run_id or datetime.now().strftime(RUN_ID_FORMAT)
+        self.data_file = f"{self.run_id}.jsonl.gz"
+        os.makedirs(archive_dir, exist_ok=True)
+
+    def append(self, query, variables, response, event=None):
+        """Archive a raw response and index it by run, event and athlete"""
+        operation = get_operation_name(query)
+        if operation not in ARCHIVED_OPERATIONS:
+            return None
+
+        event = event or {}
+        fetched_at = datetime.now().isoformat(timespec="seconds")
+        record = {
+            "runId": self.run_id,
+            "operation": operation,
+            "fetchedAt": fetched_at,
+            "event": event,
+            "variables": variables,
+            "response": response
+        }
+        data = gzip.compress(json.dumps(record).encode("utf-8") + b"\n")
+
+        with open(os.path.join(self.archive_dir, self.data_file), "ab") as f:
+            offset = f.tell()
+            f.write(data)
+
+        # Index is written after the data so it never points at a partial record
+        entry = {
+            "runId": self.run_id,
+            "operation": operation,
+            "eventId": event.get("eventId", variables.get("eventId")),
+            "athleteId": variables.get("athleteId"),
+            "fetchedAt": fetched_at,
+            "file": self.data_file,
+            "offset": offset,
+            "length": len(data)
+        }
+        with open(os.path.join(self.archive_dir, INDEX_FILE), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+        return entry
+
+def read_index(archive_dir=ARCHIVE_DIR, run_id=None, event_id=None, athlete_id=None):
+    """Return index entries, optionally filtered by run, event and athlete"""
+    index_path = os.path.join(archive_dir, INDEX_FILE)
+    if not os.path.exists(index_path):
+        return []
+
+    entries = []
+    with open(index_path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                # Skip a line left half-written by an interrupted run
+                continue
+            if run_id is not None and entry["runId"] != run_id:
+                continue
+            if event_id is not None and entry["eventId"] != event_id:
+                continue
+            if athlete_id is not None and entry["athleteId"] != athlete_id:
+                continue
+            entries.append(entry)
+    return entries
+
+def read_record(entry, archive_dir=ARCHIVE_DIR):
+    """Read and decompress the archived record an index entry points at"""
+    with open(os.path.join(archive_dir, entry["file"]), "rb") as f:
+        f.seek(entry["offset"])
+        data = f.read(entry["length"])
+    return json.loads(gzip.decompress(data))
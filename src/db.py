@@ -1,15 +1,50 @@
 import mysql.connector
 from mysql.connector import Error
+import hashlib
 import os
 from dotenv import load_dotenv
 from datetime import datetime
+from utils import parse_api_date
 
 # Load environment variables
 load_dotenv()
 
 class DatabaseManager:
+    # Dimension tables and the natural key columns that identify a row in each.
+    # Rows are unique on keyHash, a SHA-256 of the exact key strings, because
+    # the table collation would otherwise merge case, accent and trailing-space
+    # variants into one id.
+    DIMENSIONS = {
+        'athletes': ('name', 'urlSlug'),
+        'venues': ('venue',),
+        'competitions': ('competition', 'country', 'category'),
+        'disciplines': ('discipline',),
+    }
+
+    # Wide tables from before the dimension split: the fact table they move
+    # into, the columns copied unchanged and the dimension id columns
+    LEGACY_TABLES = {
+        'ranking_info': (
+            'ranking_info_fact',
+            ('id', 'row_number', 'scrape_datestamp', 'eventId', 'disciplineName', 'genderCode',
+             'qualifiedBy', 'qualified', 'qualificationPosition', 'countryPosition', 'iaafId',
+             'birthDate', 'competitorIaafId', 'wind', 'result', 'date', 'countryCode', 'place',
+             'score', 'calculationId', 'label', 'created_at'),
+            {'athletes': 'athleteId', 'venues': 'venueId'},
+        ),
+        'athlete_results': (
+            'athlete_results_fact',
+            ('id', 'row_number', 'scrape_datestamp', 'athleteCalculationId', 'eventId',
+             'disciplineName', 'date', 'disciplineCode', 'disciplineNameUrlSlug', 'typeNameUrlSlug',
+             'indoor', 'race', 'place', 'mark', 'wind', 'drop', 'resultScore', 'worldRecord',
+             'placingScore', 'performanceScore', 'monthCorrectionApplied', 'created_at'),
+            {'competitions': 'competitionId', 'disciplines': 'disciplineId'},
+        ),
+    }
+
     def __init__(self):
         self.connection = None
+        self.clear_dimension_cache()
         self.connect()
     
     def connect(self):
@@ -29,15 +64,55 @@ class DatabaseManager:
             raise
     
     def create_tables(self):
-        """Create all tables if they don't exist"""
+        """Create all tables if they don't exist, migrating old wide tables"""
         try:
             cursor = self.connection.cursor()
             
-            # Create ranking_info table
+            # Create dimension tables
+            athletes_table = """
+            CREATE TABLE IF NOT EXISTS athletes (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                keyHash BINARY(32) NOT NULL,
+                name VARCHAR(255) NOT NULL DEFAULT '',
+                urlSlug VARCHAR(255) NOT NULL DEFAULT '',
+                UNIQUE KEY uq_athlete (keyHash)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """
+            
+            venues_table = """
+            CREATE TABLE IF NOT EXISTS venues (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                keyHash BINARY(32) NOT NULL,
+                venue VARCHAR(255) NOT NULL DEFAULT '',
+                UNIQUE KEY uq_venue (keyHash)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """
+            
+            competitions_table = """
+            CREATE TABLE IF NOT EXISTS competitions (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                keyHash BINARY(32) NOT NULL,
+                competition VARCHAR(255) NOT NULL DEFAULT '',
+                country VARCHAR(255) NOT NULL DEFAULT '',
+                category VARCHAR(255) NOT NULL DEFAULT '',
+                UNIQUE KEY uq_competition (keyHash)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """
+            
+            disciplines_table = """
+            CREATE TABLE IF NOT EXISTS disciplines (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                keyHash BINARY(32) NOT NULL,
+                discipline VARCHAR(255) NOT NULL DEFAULT '',
+                UNIQUE KEY uq_discipline (keyHash)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+            """
+            
+            # Create ranking_info_fact table (athlete and venue stored as dimension ids)
             ranking_info_table = """
-            CREATE TABLE IF NOT EXISTS ranking_info (
+            CREATE TABLE IF NOT EXISTS ranking_info_fact (
                 id INT AUTO_INCREMENT PRIMARY KEY,
-                row_number INT,
+                `row_number` INT,
                 scrape_datestamp DATETIME,
                 eventId INT,
                 disciplineName VARCHAR(255),
@@ -46,14 +121,13 @@ class DatabaseManager:
                 qualified BOOLEAN,
                 qualificationPosition INT,
                 countryPosition INT,
-                name VARCHAR(255),
-                urlSlug VARCHAR(255),
+                athleteId INT,
                 iaafId VARCHAR(255),
                 birthDate DATE,
                 competitorIaafId VARCHAR(255),
                 wind VARCHAR(50),
                 result VARCHAR(255),
-                venue VARCHAR(255),
+                venueId INT,
                 date DATE,
                 countryCode VARCHAR(10),
                 place INT,
@@ -64,15 +138,32 @@ class DatabaseManager:
                 INDEX idx_eventId (eventId),
                 INDEX idx_disciplineName (disciplineName),
                 INDEX idx_countryCode (countryCode),
+                INDEX idx_athleteId (athleteId),
+                INDEX idx_venueId (venueId),
                 INDEX idx_scrape_datestamp (scrape_datestamp)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             """
             
+            # ranking_info view presents the wide layout over the fact table
+            ranking_info_view = """
+            CREATE OR REPLACE VIEW ranking_info AS
+            SELECT
+                f.id, f.`row_number`, f.scrape_datestamp, f.eventId, f.disciplineName,
+                f.genderCode, f.qualifiedBy, f.qualified, f.qualificationPosition,
+                f.countryPosition, NULLIF(a.name, '') AS name, NULLIF(a.urlSlug, '') AS urlSlug,
+                f.iaafId, f.birthDate, f.competitorIaafId, f.wind, f.result,
+                v.venue, f.date, f.countryCode, f.place, f.score, f.calculationId,
+                f.label, f.created_at
+            FROM ranking_info_fact f
+            LEFT JOIN athletes a ON a.id = f.athleteId
+            LEFT JOIN venues v ON v.id = f.venueId
+            """
+            
             # Create event_info table
             event_info_table = """
             CREATE TABLE IF NOT EXISTS event_info (
                 id INT AUTO_INCREMENT PRIMARY KEY,
-                row_number INT,
+                `row_number` INT,
                 scrape_datestamp DATETIME,
                 eventId INT,
                 groupByCountry BOOLEAN,
@@ -97,29 +188,27 @@ class DatabaseManager:
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             """
             
-            # Create athlete_results table
+            # Create athlete_results_fact table (competition and discipline stored as dimension ids)
             athlete_results_table = """
-            CREATE TABLE IF NOT EXISTS athlete_results (
+            CREATE TABLE IF NOT EXISTS athlete_results_fact (
                 id INT AUTO_INCREMENT PRIMARY KEY,
-                row_number INT,
+                `row_number` INT,
                 scrape_datestamp DATETIME,
                 athleteCalculationId INT,
                 eventId INT,
                 disciplineName VARCHAR(255),
                 date DATE,
-                competition VARCHAR(255),
-                country VARCHAR(255),
-                category VARCHAR(255),
+                competitionId INT,
                 disciplineCode VARCHAR(50),
                 disciplineNameUrlSlug VARCHAR(255),
                 typeNameUrlSlug VARCHAR(255),
                 indoor BOOLEAN,
-                discipline VARCHAR(255),
+                disciplineId INT,
                 race VARCHAR(255),
                 place INT,
                 mark VARCHAR(255),
                 wind VARCHAR(50),
-                drop VARCHAR(50),
+                `drop` VARCHAR(50),
                 resultScore DECIMAL(10,2),
                 worldRecord BOOLEAN,
                 placingScore DECIMAL(10,2),
@@ -130,14 +219,40 @@ class DatabaseManager:
                 INDEX idx_eventId (eventId),
                 INDEX idx_disciplineName (disciplineName),
                 INDEX idx_date (date),
+                INDEX idx_competitionId (competitionId),
+                INDEX idx_disciplineId (disciplineId),
                 INDEX idx_scrape_datestamp (scrape_datestamp)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             """
             
-            # Execute table creation
+            # athlete_results view presents the wide layout over the fact table
+            athlete_results_view = """
+            CREATE OR REPLACE VIEW athlete_results AS
+            SELECT
+                f.id, f.`row_number`, f.scrape_datestamp, f.athleteCalculationId, f.eventId,
+                f.disciplineName, f.date, NULLIF(c.competition, '') AS competition,
+                NULLIF(c.country, '') AS country, NULLIF(c.category, '') AS category,
+                f.disciplineCode, f.disciplineNameUrlSlug, f.typeNameUrlSlug, f.indoor,
+                d.discipline, f.race, f.place, f.mark, f.wind, f.`drop`, f.resultScore,
+                f.worldRecord, f.placingScore, f.performanceScore, f.monthCorrectionApplied,
+                f.created_at
+            FROM athlete_results_fact f
+            LEFT JOIN competitions c ON c.id = f.competitionId
+            LEFT JOIN disciplines d ON d.id = f.disciplineId
+            """
+            
+            # Execute table creation (dimensions first, views last)
+            cursor.execute(athletes_table)
+            cursor.execute(venues_table)
+            cursor.execute(competitions_table)
+            cursor.execute(disciplines_table)
             cursor.execute(ranking_info_table)
             cursor.execute(event_info_table)
             cursor.execute(athlete_results_table)
+            for table in self.LEGACY_TABLES:
+                self.migrate_legacy_table(cursor, table)
+            cursor.execute(ranking_info_view)
+            cursor.execute(athlete_results_view)
             
             self.connection.commit()
             print("All tables created successfully")
@@ -149,54 +264,174 @@ class DatabaseManager:
             if cursor:
                 cursor.close()
     
-    def insert_ranking_info(self, data, scrape_datestamp):
-        """Insert ranking info data"""
+    def clear_dimension_cache(self):
+        """Reset the in-process keyHash -> surrogate id lookup cache"""
+        self.dimension_cache = {}
+    
+    @classmethod
+    def dimension_key(cls, table, row):
+        """Return a row's natural key strings for a dimension, or None if all are empty"""
+        key = tuple(str(row.get(column) or '') for column in cls.DIMENSIONS[table])
+        return key if any(key) else None
+    
+    @staticmethod
+    def dimension_key_hash(key):
+        """Hash natural key strings the same way as dimension_key_sql"""
+        return hashlib.sha256('\x1f'.join(key).encode('utf-8')).digest()
+    
+    @classmethod
+    def dimension_key_sql(cls, table, alias):
+        """SQL expression computing a dimension keyHash from a wide-table row"""
+        parts = ', '.join(f"COALESCE({alias}.{column}, '')" for column in cls.DIMENSIONS[table])
+        return f"UNHEX(SHA2(CONCAT_WS(X'1F', {parts}), 256))"
+    
+    def migrate_legacy_table(self, cursor, table):
+        """Move a wide base table into its fact table and rename it to <table>_legacy"""
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND TABLE_TYPE = 'BASE TABLE'
+        """, (table,))
+        if not cursor.fetchone()[0]:
+            return
+        
+        fact_table, columns, dimensions = self.LEGACY_TABLES[table]
+        print(f"Migrating {table} into {fact_table}...")
+        
+        # Fill each dimension with every key the wide table uses
+        for dimension in dimensions:
+            key_columns = self.DIMENSIONS[dimension]
+            key_values = [f"COALESCE(w.{column}, '')" for column in key_columns]
+            cursor.execute(f"""
+            INSERT INTO {dimension} (keyHash, {', '.join(key_columns)})
+            SELECT * FROM (
+                SELECT {self.dimension_key_sql(dimension, 'w')} AS keyHash,
+                    {', '.join(f"{value} AS {column}" for value, column in zip(key_values, key_columns))}
+                FROM {table} w
+                WHERE LENGTH(CONCAT({', '.join(key_values)})) > 0
+            ) AS src
+            ON DUPLICATE KEY UPDATE id = {dimension}.id
+            """)
+        
+        # Copy all rows with their dimension ids in one statement. Ids are kept,
+        # so rows copied by an interrupted migration are skipped on a re-run.
+        joins = '\n        '.join(
+            f"LEFT JOIN {dimension} ON {dimension}.keyHash = {self.dimension_key_sql(dimension, 'w')}"
+            for dimension in dimensions
+        )
+        cursor.execute(f"""
+        INSERT INTO {fact_table} (
+            {', '.join(f'`{column}`' for column in columns)}, {', '.join(dimensions.values())}
+        )
+        SELECT {', '.join(f'w.`{column}`' for column in columns)},
+            {', '.join(f'{dimension}.id' for dimension in dimensions)}
+        FROM {table} w
+        {joins}
+        LEFT JOIN {fact_table} f ON f.id = w.id
+        WHERE f.id IS NULL
+        """)
+        migrated = cursor.rowcount
+        self.connection.commit()
+        self.clear_dimension_cache()
+        
+        # The old table is kept for checking until it is dropped by hand
+        cursor.execute(f"RENAME TABLE {table} TO {table}_legacy")
+        print(f"Migrated {migrated} rows from {table}, old table kept as {table}_legacy")
+    
+    def resolve_dimension_ids(self, cursor, table, data):
+        """Make sure every key used by data has a cached id, inserting new keys in bulk"""
+        if table not in self.dimension_cache:
+            # One query per dimension and process instead of one per key
+            cursor.execute(f"SELECT keyHash, id FROM {table}")
+            self.dimension_cache[table] = {
+                bytes(key_hash): dimension_id for key_hash, dimension_id in cursor.fetchall()
+            }
+        cache = self.dimension_cache[table]
+        
+        new_keys = {}
+        for row in data:
+            key = self.dimension_key(table, row)
+            if key:
+                key_hash = self.dimension_key_hash(key)
+                if key_hash not in cache:
+                    new_keys[key_hash] = key
+        if not new_keys:
+            return
+        
+        columns = self.DIMENSIONS[table]
+        query = f"""
+        INSERT INTO {table} (keyHash, {', '.join(columns)})
+        VALUES ({', '.join(['%s'] * (len(columns) + 1))})
+        ON DUPLICATE KEY UPDATE id = id
+        """
+        cursor.executemany(query, [(key_hash,) + key for key_hash, key in new_keys.items()])
+        
+        hashes = list(new_keys)
+        cursor.execute(
+            f"SELECT keyHash, id FROM {table} WHERE keyHash IN ({', '.join(['%s'] * len(hashes))})",
+            hashes
+        )
+        cache.update({bytes(key_hash): dimension_id for key_hash, dimension_id in cursor.fetchall()})
+    
+    def get_dimension_id(self, table, row):
+        """Return the cached surrogate id of a row's dimension key"""
+        key = self.dimension_key(table, row)
+        return self.dimension_cache[table][self.dimension_key_hash(key)] if key else None
+    
+    def insert_ranking_info(self, data, scrape_datestamp, commit=True):
+        """Insert ranking info data, leaving the transaction open if commit is False"""
         try:
             cursor = self.connection.cursor()
             
             query = """
-            INSERT INTO ranking_info (
-                row_number, scrape_datestamp, eventId, disciplineName, genderCode,
+            INSERT INTO ranking_info_fact (
+                `row_number`, scrape_datestamp, eventId, disciplineName, genderCode,
                 qualifiedBy, qualified, qualificationPosition, countryPosition,
-                name, urlSlug, iaafId, birthDate, competitorIaafId, wind,
-                result, venue, date, countryCode, place, score, calculationId, label
+                athleteId, iaafId, birthDate, competitorIaafId, wind,
+                result, venueId, date, countryCode, place, score, calculationId, label
             ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
+                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s,
                 %s, %s, %s, %s, %s, %s, %s, %s
             )
             """
             
+            self.resolve_dimension_ids(cursor, 'athletes', data)
+            self.resolve_dimension_ids(cursor, 'venues', data)
+            
+            rows = []
             for i, row in enumerate(data, 1):
-                values = (
+                rows.append((
                     i, scrape_datestamp,
                     row.get('eventId'), row.get('disciplineName'), row.get('genderCode'),
                     row.get('qualifiedBy'), row.get('qualified'), row.get('qualificationPosition'),
-                    row.get('countryPosition'), row.get('name'), row.get('urlSlug'),
-                    row.get('iaafId'), row.get('birthDate'), row.get('competitorIaafId'),
-                    row.get('wind'), row.get('result'), row.get('venue'), row.get('date'),
-                    row.get('countryCode'), row.get('place'), row.get('score'),
+                    row.get('countryPosition'), self.get_dimension_id('athletes', row),
+                    row.get('iaafId'), parse_api_date(row.get('birthDate')), row.get('competitorIaafId'),
+                    row.get('wind'), row.get('result'), self.get_dimension_id('venues', row),
+                    parse_api_date(row.get('date')), row.get('countryCode'), row.get('place'), row.get('score'),
                     row.get('calculationId'), row.get('label')
-                )
-                cursor.execute(query, values)
+                ))
+            cursor.executemany(query, rows)
             
-            self.connection.commit()
+            if commit:
+                self.connection.commit()
             print(f"Inserted {len(data)} rows into ranking_info table")
             
-        except Error as e:
+        except (Error, ValueError) as e:
+            # Ids cached during a failed transaction may not exist after rollback
+            self.clear_dimension_cache()
             print(f"Error inserting ranking_info: {e}")
             raise
         finally:
             if cursor:
                 cursor.close()
     
-    def insert_event_info(self, data, scrape_datestamp):
-        """Insert event info data"""
+    def insert_event_info(self, data, scrape_datestamp, commit=True):
+        """Insert event info data, leaving the transaction open if commit is False"""
         try:
             cursor = self.connection.cursor()
             
             query = """
             INSERT INTO event_info (
-                row_number, scrape_datestamp, eventId, groupByCountry, entryNumber,
+                `row_number`, scrape_datestamp, eventId, groupByCountry, entryNumber,
                 entryStandard, disciplineName, maxCompetitorsByCoutnry,
                 firstQualificationDay, lastQualificationDay, firstRankingDay,
                 lastRankingDay, rankDate, numberOfCompetitorsQualifiedByEntryStandard,
@@ -212,8 +447,11 @@ class DatabaseManager:
                     i, scrape_datestamp,
                     row.get('eventId'), row.get('groupByCountry'), row.get('entryNumber'),
                     row.get('entryStandard'), row.get('disciplineName'), row.get('maxCompetitorsByCoutnry'),
-                    row.get('firstQualificationDay'), row.get('lastQualificationDay'),
-                    row.get('firstRankingDay'), row.get('lastRankingDay'), row.get('rankDate'),
+                    parse_api_date(row.get('firstQualificationDay')),
+                    parse_api_date(row.get('lastQualificationDay')),
+                    parse_api_date(row.get('firstRankingDay')),
+                    parse_api_date(row.get('lastRankingDay')),
+                    parse_api_date(row.get('rankDate')),
                     row.get('numberOfCompetitorsQualifiedByEntryStandard'),
                     row.get('numberOfCompetitorsQualifiedByTopList'),
                     row.get('numberOfCompetitorsFilledUpByWorldRankings'),
@@ -222,55 +460,90 @@ class DatabaseManager:
                 )
                 cursor.execute(query, values)
             
-            self.connection.commit()
+            if commit:
+                self.connection.commit()
             print(f"Inserted {len(data)} rows into event_info table")
             
-        except Error as e:
+        except (Error, ValueError) as e:
             print(f"Error inserting event_info: {e}")
             raise
         finally:
             if cursor:
                 cursor.close()
     
-    def insert_athlete_results(self, data, scrape_datestamp):
-        """Insert athlete results data"""
+    def insert_athlete_results(self, data, scrape_datestamp, commit=True):
+        """Insert athlete results data, leaving the transaction open if commit is False"""
         try:
             cursor = self.connection.cursor()
             
             query = """
-            INSERT INTO athlete_results (
-                row_number, scrape_datestamp, athleteCalculationId, eventId, disciplineName,
-                date, competition, country, category, disciplineCode, disciplineNameUrlSlug,
-                typeNameUrlSlug, indoor, discipline, race, place, mark, wind, drop,
+            INSERT INTO athlete_results_fact (
+                `row_number`, scrape_datestamp, athleteCalculationId, eventId, disciplineName,
+                date, competitionId, disciplineCode, disciplineNameUrlSlug,
+                typeNameUrlSlug, indoor, disciplineId, race, place, mark, wind, `drop`,
                 resultScore, worldRecord, placingScore, performanceScore, monthCorrectionApplied
             ) VALUES (
-                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
+                %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
             )
             """
             
+            self.resolve_dimension_ids(cursor, 'competitions', data)
+            self.resolve_dimension_ids(cursor, 'disciplines', data)
+            
+            rows = []
             for i, row in enumerate(data, 1):
-                values = (
+                rows.append((
                     i, scrape_datestamp,
                     row.get('athleteCalculationId'), row.get('eventId'), row.get('disciplineName'),
-                    row.get('date'), row.get('competition'), row.get('country'), row.get('category'),
+                    parse_api_date(row.get('date')), self.get_dimension_id('competitions', row),
                     row.get('disciplineCode'), row.get('disciplineNameUrlSlug'), row.get('typeNameUrlSlug'),
-                    row.get('indoor'), row.get('discipline'), row.get('race'), row.get('place'),
-                    row.get('mark'), row.get('wind'), row.get('drop'), row.get('resultScore'),
-                    row.get('worldRecord'), row.get('placingScore'), row.get('performanceScore'),
+                    row.get('indoor'), self.get_dimension_id('disciplines', row),
+                    row.get('race'), row.get('place'), row.get('mark'), row.get('wind'),
+                    row.get('drop'), row.get('resultScore'), row.get('worldRecord'),
+                    row.get('placingScore'), row.get('performanceScore'),
                     row.get('monthCorrectionApplied')
-                )
-                cursor.execute(query, values)
+                ))
+            cursor.executemany(query, rows)
             
-            self.connection.commit()
+            if commit:
+                self.connection.commit()
             print(f"Inserted {len(data)} rows into athlete_results table")
             
-        except Error as e:
+        except (Error, ValueError) as e:
+            # Ids cached during a failed transaction may not exist after rollback
+            self.clear_dimension_cache()
             print(f"Error inserting athlete_results: {e}")
             raise
         finally:
             if cursor:
                 cursor.close()
     
+    def replace_snapshot(self, ranking_info, event_info, athlete_results, scrape_datestamp):
+        """Replace all rows of one snapshot in a single transaction"""
+        try:
+            cursor = self.connection.cursor()
+            
+            # Re-running a snapshot must not leave a second copy behind
+            for table in ('ranking_info_fact', 'event_info', 'athlete_results_fact'):
+                cursor.execute(f"DELETE FROM {table} WHERE scrape_datestamp = %s", (scrape_datestamp,))
+                print(f"Deleted {cursor.rowcount} existing rows from {table}")
+            
+            self.insert_ranking_info(ranking_info, scrape_datestamp, commit=False)
+            self.insert_event_info(event_info, scrape_datestamp, commit=False)
+            self.insert_athlete_results(athlete_results, scrape_datestamp, commit=False)
+            
+            self.connection.commit()
+            
+        except (Error, ValueError) as e:
+            self.connection.rollback()
+            # Ids cached during the rolled-back transaction no longer exist
+            self.clear_dimension_cache()
+            print(f"Error replacing snapshot {scrape_datestamp}: {e}")
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+    
     def close(self):
         """Close database connection"""
         if self.connection and self.connection.is_connected():
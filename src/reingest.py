@@ -0,0 +1,123 @@
+import argparse
+import os
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from archive import ARCHIVE_DIR, read_index, read_record
+from scraper import parse_event_result, parse_athlete_results, collect_results, export_csv_files
+
+def rebuild_event(entries, archive_dir=ARCHIVE_DIR):
+    """Rebuild one event's data from its archived responses"""
+    result = {"event_info": None, "qualifications": [], "athlete_results": []}
+
+    for entry in entries:
+        # A bad record (e.g. a GraphQL error payload) only skips that record
+        try:
+            record = read_record(entry, archive_dir)
+            if record["operation"] == "GetChampionshipQualifications":
+                event_info, qualifications = parse_event_result(record["response"], record["event"])
+                result["event_info"] = event_info
+                result["qualifications"] = qualifications
+            elif record["operation"] == "GetRankingScoreCalculation":
+                calculation_id = record["variables"].get("athleteId")
+                result["athlete_results"].extend(
+                    parse_athlete_results(record["response"], calculation_id, record["event"])
+                )
+        except Exception as e:
+            print(f"  Error re-ingesting {entry['operation']} record at {entry['file']}:{entry['offset']}: {e}")
+            continue
+
+    return result
+
+def group_entries(entries):
+    """Group index entries by run and then by event, keeping archive order"""
+    runs = defaultdict(lambda: defaultdict(list))
+    for entry in entries:
+        runs[entry["runId"]][entry["eventId"]].append(entry)
+    return runs
+
+def get_run_datestamp(events):
+    """Return the time the first response of a run was fetched"""
+    return min(datetime.fromisoformat(entries[0]["fetchedAt"]) for entries in events.values())
+
+def load_run(run_id, futures, events, args, db=None):
+    """Write one rebuilt run to CSVs or the database; return False if it failed"""
+    print(f"\nRe-ingesting run {run_id}...")
+    # A failed run is reported and the remaining runs still load
+    try:
+        results = [future.result() for future in futures]
+        all_qualifications, all_event_info, all_athlete_results = collect_results(results)
+
+        print(f"Total qualifications found: {len(all_qualifications)}")
+        print(f"Total events processed: {len(all_event_info)}")
+        print(f"Total athlete results found: {len(all_athlete_results)}")
+
+        if db:
+            db.replace_snapshot(all_qualifications, all_event_info, all_athlete_results,
+                                get_run_datestamp(events))
+        else:
+            export_csv_files(all_qualifications, all_event_info, all_athlete_results,
+                             os.path.join(args.output_dir, run_id))
+    except Exception as e:
+        print(f"  Error re-ingesting run {run_id}: {e}")
+        return False
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild CSVs or database tables from the raw-response archive")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR, required=not ARCHIVE_DIR,
+                        help="Archive directory to read from (default: $ARCHIVE_DIR)")
+    parser.add_argument("--run", action="append", dest="runs", help="Run id to re-ingest (repeatable, default: all runs)")
+    parser.add_argument("--output-dir", default="reingest", help="Directory for rebuilt CSVs, one subdirectory per run")
+    parser.add_argument("--db", action="store_true", help="Load into the database instead of writing CSVs; "
+                        "rows already stored for a run's scrape_datestamp are deleted first, "
+                        "in the same transaction, so re-running a run replaces it")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    args = parser.parse_args()
+
+    # Read the index once; every (run, event) task gets its own entries
+    runs = group_entries(read_index(args.archive_dir))
+    run_ids = []
+    for run_id in args.runs or list(runs):
+        if run_id in runs:
+            run_ids.append(run_id)
+        else:
+            print(f"Run {run_id} not found in archive")
+    print(f"Re-ingesting {len(run_ids)} runs from {args.archive_dir}")
+
+    failed_runs = []
+    db = None
+    if args.db:
+        from db import DatabaseManager
+        db = DatabaseManager()
+        db.create_tables()
+
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            # Keep a few runs queued so the workers stay busy, but no more, so
+            # rebuilt rows are written and released instead of piling up in memory
+            max_runs_in_flight = 2 * (args.workers or os.cpu_count() or 1)
+            pending = iter(run_ids)
+            in_flight = deque()
+            while True:
+                for run_id in pending:
+                    in_flight.append((run_id, [executor.submit(rebuild_event, entries, args.archive_dir)
+                                               for entries in runs[run_id].values()]))
+                    if len(in_flight) >= max_runs_in_flight:
+                        break
+                if not in_flight:
+                    break
+                run_id, futures = in_flight.popleft()
+                if not load_run(run_id, futures, runs[run_id], args, db):
+                    failed_runs.append(run_id)
+    finally:
+        if db:
+            db.close()
+
+    if failed_runs:
+        print(f"\nRe-ingest finished with {len(failed_runs)} failed runs: {', '.join(failed_runs)}")
+        raise SystemExit(1)
+    print("\nRe-ingest complete!")
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ import aiohttp
 import json
 import os
 from dotenv import load_dotenv
+from archive import ARCHIVE_DIR, ResponseArchive
 
 # Load environment variables
 load_dotenv()
@@ -29,14 +30,18 @@ def run_graphql_query(query, variables=None):
     response.raise_for_status()
     return response.json()
 
-async def run_graphql_query_async(session, query, variables=None):
+async def run_graphql_query_async(session, query, variables=None, archive=None, event=None):
     payload = {
         "query": query,
         "variables": variables or {}
     }
     async with session.post(GRAPHQL_ENDPOINT, json=payload, headers=HEADERS) as response:
         response.raise_for_status()
-        return await response.json()
+        result = await response.json()
+    # Keep the raw response so history can be rebuilt without re-scraping
+    if archive:
+        archive.append(query, payload["variables"], result, event)
+    return result
 
 def get_all_events():
     """Get all events for the competition"""
@@ -59,7 +64,30 @@ def get_all_events():
     event_info = result.get("data", {}).get("getChampionshipQualifications", {})
     return event_info.get("events", [])
 
-async def process_event(session, event, main_query, ranking_query):
+def parse_event_result(result, event):
+    """Extract event info and qualifications from a GetChampionshipQualifications response"""
+    event_info = (result.get("data") or {}).get("getChampionshipQualifications") or {}
+    qualifications = event_info.get("qualifications") or []
+    
+    # Add event info to each qualification
+    for q in qualifications:
+        q["eventId"] = event.get("eventId")
+        q["disciplineName"] = event.get("disciplineName")
+        q["genderCode"] = event.get("genderCode")
+    
+    return event_info, qualifications
+
+def parse_athlete_results(detail_result, calculation_id, event):
+    """Extract athlete results from a GetRankingScoreCalculation response"""
+    calculation = (detail_result.get("data") or {}).get("getRankingScoreCalculation") or {}
+    results = calculation.get("results") or []
+    for r in results:
+        r["athleteCalculationId"] = calculation_id
+        r["eventId"] = event.get("eventId")
+        r["disciplineName"] = event.get("disciplineName")
+    return results
+
+async def process_event(session, event, main_query, ranking_query, archive=None):
     """Process a single event and return its data"""
     event_id = event.get("eventId")
     discipline_name = event.get("disciplineName")
@@ -74,18 +102,11 @@ async def process_event(session, event, main_query, ranking_query):
     }
     
     try:
-        result = await run_graphql_query_async(session, main_query, variables)
-        event_info = result.get("data", {}).get("getChampionshipQualifications", {})
-        qualifications = event_info.get("qualifications", [])
+        result = await run_graphql_query_async(session, main_query, variables, archive, event)
+        event_info, qualifications = parse_event_result(result, event)
         
         print(f"  Found {len(qualifications)} qualifications for {discipline_name}")
         
-        # Add event info to each qualification
-        for q in qualifications:
-            q["eventId"] = event_id
-            q["disciplineName"] = discipline_name
-            q["genderCode"] = gender_code
-        
         # Get athlete results for those with calculationId
         athlete_results = []
         athletes_with_calculation = [q for q in qualifications if q.get("calculationId")]
@@ -101,14 +122,10 @@ async def process_event(session, event, main_query, ranking_query):
                 try:
                     print(f"    Fetching results for athlete {i+1}/{len(athletes_to_process)} (ID: {calculation_id})...")
                     detail_variables = {"athleteId": int(calculation_id)}
-                    detail_result = await run_graphql_query_async(session, ranking_query, detail_variables)
-                    results = detail_result.get("data", {}).get("getRankingScoreCalculation", {}).get("results", [])
+                    detail_result = await run_graphql_query_async(session, ranking_query, detail_variables, archive, event)
+                    results = parse_athlete_results(detail_result, calculation_id, event)
                     print(f"      Found {len(results)} results for athlete {calculation_id}")
-                    for r in results:
-                        r["athleteCalculationId"] = calculation_id
-                        r["eventId"] = event_id
-                        r["disciplineName"] = discipline_name
-                        athlete_results.append(r)
+                    athlete_results.extend(results)
                 except Exception as e:
                     print(f"    Error fetching results for athlete {calculation_id}: {e}")
                     continue
@@ -123,6 +140,72 @@ async def process_event(session, event, main_query, ranking_query):
         print(f"  Error processing event {event_id}: {e}")
         return None
 
+def collect_results(results):
+    """Flatten per-event results into qualifications, event info and athlete results"""
+    all_qualifications = []
+    all_event_info = []
+    all_athlete_results = []
+    
+    for result in results:
+        if result and isinstance(result, dict):
+            if result.get("qualifications"):
+                all_qualifications.extend(result["qualifications"])
+            if result.get("event_info"):
+                all_event_info.append(result["event_info"])
+            if result.get("athlete_results"):
+                all_athlete_results.extend(result["athlete_results"])
+    
+    return all_qualifications, all_event_info, all_athlete_results
+
+def export_csv_files(all_qualifications, all_event_info, all_athlete_results, output_dir="."):
+    """Write ranking_info.csv, event_info.csv and athlete_results.csv to output_dir"""
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # Export qualifications (excluding 'average' and 'sum')
+    if all_qualifications:
+        ranking_info_keys = set()
+        for q in all_qualifications:
+            ranking_info_keys.update(k for k in q.keys() if k not in ("average", "sum"))
+        
+        with open(os.path.join(output_dir, "ranking_info.csv"), "w", newline="", encoding="utf-8") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=list(ranking_info_keys))
+            writer.writeheader()
+            for q in all_qualifications:
+                filtered_q = {k: v for k, v in q.items() if k not in ("average", "sum")}
+                writer.writerow(filtered_q)
+        print("Exported all qualifications to ranking_info.csv")
+    
+    # Export event info
+    if all_event_info:
+        event_fields = [
+            "eventId", "groupByCountry", "entryNumber", "entryStandard", "disciplineName",
+            "maxCompetitorsByCoutnry", "firstQualificationDay", "lastQualificationDay",
+            "firstRankingDay", "lastRankingDay", "rankDate",
+            "numberOfCompetitorsQualifiedByEntryStandard", "numberOfCompetitorsQualifiedByTopList",
+            "numberOfCompetitorsFilledUpByWorldRankings", "numberOfCompetitorsQualifiedByUniversalityPlaces",
+            "numberOfCompetitorsQualifiedByDesignatedCompetition"
+        ]
+        
+        with open(os.path.join(output_dir, "event_info.csv"), "w", newline="", encoding="utf-8") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=event_fields)
+            writer.writeheader()
+            for event_info in all_event_info:
+                writer.writerow({field: event_info.get(field) for field in event_fields})
+        print("Exported event info to event_info.csv")
+    
+    # Export athlete results
+    if all_athlete_results:
+        result_keys = set()
+        for r in all_athlete_results:
+            result_keys.update(r.keys())
+        
+        with open(os.path.join(output_dir, "athlete_results.csv"), "w", newline="", encoding="utf-8") as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=list(result_keys))
+            writer.writeheader()
+            for r in all_athlete_results:
+                writer.writerow(r)
+        print("Exported athlete results to athlete_results.csv")
+
 async def main():
     print("Starting scraper with async processing...")
     
@@ -237,30 +320,23 @@ async def main():
     }
     """
 
+    # Archive raw responses for offline re-ingest when ARCHIVE_DIR is set
+    archive = ResponseArchive(ARCHIVE_DIR) if ARCHIVE_DIR else None
+    if archive:
+        print(f"Archiving raw responses for run {archive.run_id} to {ARCHIVE_DIR}")
+    
     # Process events concurrently
     async with aiohttp.ClientSession() as session:
         # Only process the first event
         first_event = events[0] if events else None
         if first_event:
             print(f"Processing only the first event: {first_event.get('disciplineName')} (ID: {first_event.get('eventId')})")
-            result = await process_event(session, first_event, main_query, ranking_query)
+            result = await process_event(session, first_event, main_query, ranking_query, archive)
             results = [result] if result else []
         else:
             results = []
     
-    # Collect all data
-    all_qualifications = []
-    all_event_info = []
-    all_athlete_results = []
-    
-    for result in results:
-        if result and isinstance(result, dict):
-            if result.get("qualifications"):
-                all_qualifications.extend(result["qualifications"])
-            if result.get("event_info"):
-                all_event_info.append(result["event_info"])
-            if result.get("athlete_results"):
-                all_athlete_results.extend(result["athlete_results"])
+    all_qualifications, all_event_info, all_athlete_results = collect_results(results)
     
     print(f"\nTotal qualifications found: {len(all_qualifications)}")
     print(f"Total events processed: {len(all_event_info)}")
@@ -268,51 +344,7 @@ async def main():
     
     # Export data
     print("\nExporting data to CSV files...")
-    
-    # Export qualifications (excluding 'average' and 'sum')
-    if all_qualifications:
-        ranking_info_keys = set()
-        for q in all_qualifications:
-            ranking_info_keys.update(k for k in q.keys() if k not in ("average", "sum"))
-        
-        with open("ranking_info.csv", "w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=list(ranking_info_keys))
-            writer.writeheader()
-            for q in all_qualifications:
-                filtered_q = {k: v for k, v in q.items() if k not in ("average", "sum")}
-                writer.writerow(filtered_q)
-        print("Exported all qualifications to ranking_info.csv")
-    
-    # Export event info
-    if all_event_info:
-        event_fields = [
-            "eventId", "groupByCountry", "entryNumber", "entryStandard", "disciplineName",
-            "maxCompetitorsByCoutnry", "firstQualificationDay", "lastQualificationDay",
-            "firstRankingDay", "lastRankingDay", "rankDate",
-            "numberOfCompetitorsQualifiedByEntryStandard", "numberOfCompetitorsQualifiedByTopList",
-            "numberOfCompetitorsFilledUpByWorldRankings", "numberOfCompetitorsQualifiedByUniversalityPlaces",
-            "numberOfCompetitorsQualifiedByDesignatedCompetition"
-        ]
-        
-        with open("event_info.csv", "w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=event_fields)
-            writer.writeheader()
-            for event_info in all_event_info:
-                writer.writerow({field: event_info.get(field) for field in event_fields})
-        print("Exported event info to event_info.csv")
-    
-    # Export athlete results
-    if all_athlete_results:
-        result_keys = set()
-        for r in all_athlete_results:
-            result_keys.update(r.keys())
-        
-        with open("athlete_results.csv", "w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=list(result_keys))
-            writer.writeheader()
-            for r in all_athlete_results:
-                writer.writerow(r)
-        print("Exported athlete results to athlete_results.csv")
+    export_csv_files(all_qualifications, all_event_info, all_athlete_results)
     
     print("\nScraping complete!")
 
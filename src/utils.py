@@ -1 +1,12 @@
- 
\ No newline at end of file
+from datetime import date, datetime
+
+# Format of dates returned by the World Athletics API, e.g. "01 AUG 2024"
+API_DATE_FORMAT = "%d %b %Y"
+
+def parse_api_date(value):
+    """Convert an API date string to a date, passing empty values and dates through"""
+    if not value:
+        return None
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(value.strip(), API_DATE_FORMAT).date()
@@ -0,0 +1,66 @@
+import os
+from datetime import datetime
+from archive import INDEX_FILE, ResponseArchive, read_index, read_record
+from reingest import rebuild_event, group_entries, get_run_datestamp
+from scraper import collect_results
+
+QUALIFICATIONS_QUERY = "query GetChampionshipQualifications($competitionId: Int!) { x }"
+RANKING_QUERY = "query GetRankingScoreCalculation($athleteId: Int!) { x }"
+EVENT = {"eventId": 1, "disciplineName": "Men's 100 Metres", "genderCode": "M"}
+
+def qualifications_response(*names):
+    qualifications = [{"name": name, "calculationId": i} for i, name in enumerate(names, 1)]
+    return {"data": {"getChampionshipQualifications": {"eventId": 1, "qualifications": qualifications}}}
+
+def test_records_read_back_by_offset(tmp_path):
+    archive = ResponseArchive(str(tmp_path), run_id="run1")
+    first = archive.append(QUALIFICATIONS_QUERY, {"eventId": 1}, qualifications_response("A", "B"), EVENT)
+    results = {"data": {"getRankingScoreCalculation": {"results": [{"mark": "10.01"}]}}}
+    second = archive.append(RANKING_QUERY, {"athleteId": 7}, results, EVENT)
+
+    entries = read_index(str(tmp_path), run_id="run1")
+    assert entries == [first, second]
+    assert second["offset"] == first["length"]
+    assert entries[1]["athleteId"] == 7
+
+    record = read_record(entries[1], str(tmp_path))
+    assert record["operation"] == "GetRankingScoreCalculation"
+    assert record["response"] == results
+    assert read_record(entries[0], str(tmp_path))["response"] == qualifications_response("A", "B")
+
+def test_other_operations_are_not_archived(tmp_path):
+    archive = ResponseArchive(str(tmp_path), run_id="run1")
+    assert archive.append("query GetEvents { x }", {}, {"data": {}}) is None
+    assert read_index(str(tmp_path)) == []
+
+def test_truncated_index_line_is_skipped(tmp_path):
+    archive = ResponseArchive(str(tmp_path), run_id="run1")
+    archive.append(QUALIFICATIONS_QUERY, {"eventId": 1}, qualifications_response("A"), EVENT)
+    archive.append(RANKING_QUERY, {"athleteId": 1}, {"data": None}, EVENT)
+    with open(os.path.join(str(tmp_path), INDEX_FILE), "a", encoding="utf-8") as f:
+        f.write('{"runId": "run1", "operation": "GetRank')
+
+    assert len(read_index(str(tmp_path))) == 2
+
+def test_error_payload_produces_no_rows(tmp_path):
+    archive = ResponseArchive(str(tmp_path), run_id="run1")
+    error = {"data": None, "errors": [{"message": "Internal server error"}]}
+    archive.append(QUALIFICATIONS_QUERY, {"eventId": 1}, error, EVENT)
+    archive.append(RANKING_QUERY, {"athleteId": 1}, error, EVENT)
+
+    result = rebuild_event(read_index(str(tmp_path)), str(tmp_path))
+    assert collect_results([result]) == ([], [], [])
+
+def test_entries_grouped_by_run_and_event():
+    entries = [
+        {"runId": "run1", "eventId": 1, "fetchedAt": "2025-08-02T06:00:05"},
+        {"runId": "run2", "eventId": 1, "fetchedAt": "2025-08-03T06:00:00"},
+        {"runId": "run1", "eventId": 2, "fetchedAt": "2025-08-02T06:00:01"},
+        {"runId": "run1", "eventId": 1, "fetchedAt": "2025-08-02T06:00:09"},
+    ]
+    runs = group_entries(entries)
+
+    assert list(runs) == ["run1", "run2"]
+    assert list(runs["run1"]) == [1, 2]
+    assert runs["run1"][1] == [entries[0], entries[3]]
+    assert get_run_datestamp(runs["run1"]) == datetime(2025, 8, 2, 6, 0, 1)
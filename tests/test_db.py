@@ -0,0 +1,70 @@
+import hashlib
+from db import DatabaseManager
+
+def mysql_key_hash(*values):
+    """What UNHEX(SHA2(CONCAT_WS(X'1F', COALESCE(v, '') ...), 256)) returns"""
+    return hashlib.sha256(b'\x1f'.join((v if v is not None else '').encode('utf-8') for v in values)).digest()
+
+class FakeCursor:
+    def __init__(self, existing):
+        self.rows = dict(existing)
+        self.statements = []
+        self.result = []
+
+    def execute(self, query, params=None):
+        self.statements.append(" ".join(query.split()))
+        if "WHERE keyHash IN" in query:
+            self.result = [(h, self.rows[h]) for h in params]
+        else:
+            self.result = list(self.rows.items())
+
+    def executemany(self, query, rows):
+        self.statements.append(" ".join(query.split()))
+        for row in rows:
+            self.rows.setdefault(row[0], len(self.rows) + 1)
+
+    def fetchall(self):
+        return self.result
+
+def make_manager():
+    # Skip __init__, which connects to MySQL
+    db = DatabaseManager.__new__(DatabaseManager)
+    db.clear_dimension_cache()
+    return db
+
+def test_key_hash_matches_sql_expression():
+    sql = DatabaseManager.dimension_key_sql('competitions', 'w')
+    assert sql == ("UNHEX(SHA2(CONCAT_WS(X'1F', COALESCE(w.competition, ''), "
+                   "COALESCE(w.country, ''), COALESCE(w.category, '')), 256))")
+
+    row = {'competition': 'Meeting de Paris', 'country': None, 'category': 'GW'}
+    key = DatabaseManager.dimension_key('competitions', row)
+    assert key == ('Meeting de Paris', '', 'GW')
+    assert DatabaseManager.dimension_key_hash(key) == mysql_key_hash('Meeting de Paris', None, 'GW')
+
+def test_key_hash_keeps_case_accents_and_trailing_spaces():
+    hashes = {DatabaseManager.dimension_key_hash((venue,)) for venue in ('Zürich', 'Zurich', 'zürich', 'Zürich ')}
+    assert len(hashes) == 4
+
+def test_empty_key_has_no_id():
+    db = make_manager()
+    assert DatabaseManager.dimension_key('athletes', {'name': None, 'urlSlug': ''}) is None
+    db.dimension_cache['athletes'] = {}
+    assert db.get_dimension_id('athletes', {}) is None
+
+def test_existing_keys_are_loaded_once_and_only_new_keys_inserted():
+    db = make_manager()
+    known = DatabaseManager.dimension_key_hash(('Eugene',))
+    cursor = FakeCursor({known: 1})
+    data = [{'venue': 'Eugene'}, {'venue': 'Rome'}, {'venue': 'Rome'}, {'venue': None}]
+
+    db.resolve_dimension_ids(cursor, 'venues', data)
+    db.resolve_dimension_ids(cursor, 'venues', data)
+
+    assert cursor.statements[0] == "SELECT keyHash, id FROM venues"
+    inserts = [s for s in cursor.statements if s.startswith("INSERT")]
+    assert len(inserts) == 1
+    assert len(cursor.statements) == 3
+    assert db.get_dimension_id('venues', data[0]) == 1
+    assert db.get_dimension_id('venues', data[1]) == 2
+    assert db.get_dimension_id('venues', data[3]) is None